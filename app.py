@@ -1,8 +1,11 @@
 import os
-import networkx as nx
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, FrozenSet, Tuple
+
+import numpy as np
 from flask import Flask, render_template, request, session
 
+from src import cache as cache_mod
 from src import graph as graph_mod
 from src import scoring as scoring_mod
 from src import graphvis
@@ -20,132 +23,195 @@ print("="*80)
 RATINGS_PATH = "res/ratings_netflix.csv"
 MOVIES_PATH = "res/movies_netflix.csv"
 
-print("\n[1/5] 📂 Loading data...")
-RATINGS_DF, MOVIES_DF = graph_mod.load_data(RATINGS_PATH, MOVIES_PATH)
-print(f"      ✓ Loaded {len(RATINGS_DF):,} ratings and {len(MOVIES_DF):,} movies")
-
-print("\n[2/5] 👥 Filtering users (min 10 ratings ≥3.5)...")
-RATINGS_FILTERED = graph_mod.downsample_users(RATINGS_DF, min_likes=10, threshold=3.5, sample_n=None)
-print(f"      ✓ Filtered to {len(RATINGS_FILTERED):,} positive ratings")
-
-print("\n[3/5] 🔗 Building bipartite graph...")
-G, MAPPINGS = graph_mod.build_bipartite_graph(RATINGS_FILTERED, MOVIES_DF, threshold=3.5)
-print(f"      ✓ Graph created with {G.number_of_nodes():,} nodes and {G.number_of_edges():,} edges")
-graph_mod.validate_graph(G)
-
-# Free memory: delete filtered ratings and movies DataFrames (no longer needed)
-del RATINGS_FILTERED
-import gc
-gc.collect()
-print("      ✓ Freed memory from unused DataFrames")
+# Graph build parameters (also recorded in the cache manifest)
+MIN_LIKES = 10
+THRESHOLD = 3.5
+SAMPLE_N = None
+
+# Graph structures are cached on disk and rebuilt only when the CSVs or parameters change
+CACHE_DIR = os.environ.get('GRAPH_CACHE_DIR', 'cache')
+CACHE_MANIFEST = cache_mod.graph_manifest(
+    [RATINGS_PATH, MOVIES_PATH], min_likes=MIN_LIKES, threshold=THRESHOLD, sample_n=SAMPLE_N
+)
+MAPPINGS = cache_mod.load_graph_cache(CACHE_DIR, CACHE_MANIFEST)
+
+if MAPPINGS is not None:
+    # Only the CSR mappings are cached; the NetworkX graph is not needed to serve requests
+    print(f"\n[1-3/5] 💾 Loaded cached bipartite graph from {CACHE_DIR}/")
+    print(f"      ✓ {len(MAPPINGS['user_nodes']):,} users, {len(MAPPINGS['movie_nodes']):,} movies "
+          f"and {MAPPINGS['user_csr'].nnz:,} edges")
+else:
+    # The CSVs are only read when the cache has to be rebuilt
+    print("\n[1/5] 📂 Loading data...")
+    RATINGS_DF, MOVIES_DF = graph_mod.load_data(RATINGS_PATH, MOVIES_PATH)
+    print(f"      ✓ Loaded {len(RATINGS_DF):,} ratings and {len(MOVIES_DF):,} movies")
+
+    print(f"\n[2/5] 👥 Filtering users (min {MIN_LIKES} ratings ≥{THRESHOLD})...")
+    RATINGS_FILTERED = graph_mod.downsample_users(RATINGS_DF, min_likes=MIN_LIKES, threshold=THRESHOLD, sample_n=SAMPLE_N)
+    print(f"      ✓ Filtered to {len(RATINGS_FILTERED):,} positive ratings")
+
+    print("\n[3/5] 🔗 Building bipartite graph...")
+    G, MAPPINGS = graph_mod.build_bipartite_graph(RATINGS_FILTERED, MOVIES_DF, threshold=THRESHOLD)
+    print(f"      ✓ Graph created with {G.number_of_nodes():,} nodes and {G.number_of_edges():,} edges")
+    graph_mod.validate_graph(G, MAPPINGS["user_nodes"], MAPPINGS["movie_nodes"])
+
+    try:
+        cache_mod.save_graph_cache(CACHE_DIR, MAPPINGS, CACHE_MANIFEST)
+        print(f"      ✓ Saved graph cache to {CACHE_DIR}/")
+    except OSError as e:
+        print(f"      ! Could not write graph cache: {e}")
+
+    # Free memory: the NetworkX graph is only built to be validated, and the
+    # DataFrames are not needed once the mappings exist; requests use the CSR mappings
+    del G, RATINGS_DF, MOVIES_DF, RATINGS_FILTERED
+    import gc
+    gc.collect()
+    print("      ✓ Freed memory from the build-time graph and DataFrames")
 
 # Prepare lists for form selects
-USER_NODES = [n for n, d in G.nodes(data=True) if d.get("bipartite") == "user"]
-MOVIE_NODES = [n for n, d in G.nodes(data=True) if d.get("bipartite") == "movie"]
+USER_NODES = MAPPINGS["user_nodes"]
+MOVIE_NODES = MAPPINGS["movie_nodes"]
 
 print("\n[4/5] ⚡ Building performance caches...")
 
-# Cache: movie_node -> set of user nodes who liked it
-print("      - Building movie likers cache...")
-MOVIE_LIKERS_CACHE = {}
-for m_node in MOVIE_NODES:
-    MOVIE_LIKERS_CACHE[m_node] = {nbr for nbr in G.neighbors(m_node) if G.nodes[nbr].get("bipartite") == "user"}
-
-# Cache: (movie_id, user_id) -> rating for O(1) lookups
-print("      - Building ratings lookup cache...")
-RATINGS_LOOKUP = {}
-for _, row in RATINGS_DF.iterrows():
-    RATINGS_LOOKUP[(int(row['movieId']), int(row['userId']))] = float(row['rating'])
-
-# Cache: movie_node -> genres set for faster filtering
-print("      - Building genres cache...")
-MOVIE_GENRES_CACHE = {}
-for m_node in MOVIE_NODES:
-    genres_str = G.nodes[m_node].get("genres")
-    if genres_str:
-        MOVIE_GENRES_CACHE[m_node] = set(str(genres_str).split('|'))
-    else:
-        MOVIE_GENRES_CACHE[m_node] = set()
+# Movie -> likers adjacency as CSR over compact int32 user indices (no per-movie Python sets)
+print("      - Using movie likers CSR...")
+MOVIE_CSR = MAPPINGS["movie_csr"]
+USER_CSR = MAPPINGS["user_csr"]
+
+# Inverted index: genre -> int32 array of movie indices carrying that genre
+print("      - Building genre index...")
+GENRE_TO_MOVIES = graph_mod.build_genre_index(MAPPINGS["movie_genres"])
+NO_MOVIES = np.empty(0, dtype=np.int32)
 
-print(f"      ✓ Caches built: {len(MOVIE_LIKERS_CACHE):,} movies, {len(RATINGS_LOOKUP):,} rating lookups")
+# Compact user/movie index lookups for vectorized scoring
+USER_ID_TO_IDX = MAPPINGS["user_id_to_idx"]
+MOVIE_ID_TO_IDX = MAPPINGS["movie_id_to_idx"]
+MOVIE_DEGREE = np.diff(MOVIE_CSR.indptr)
+# Supporter ratings as int8 half-stars (rating * 2), aligned with MOVIE_CSR's rows
+MOVIE_HALF_STARS = MAPPINGS["movie_half_stars"]
+
+print(f"      ✓ Caches built: {len(MOVIE_NODES):,} movies, {MOVIE_HALF_STARS.nnz:,} stored ratings")
 
 print("\n[5/5] 🎯 Preparing movie and genre lists...")
+
+# (movieId, title) pairs for the movie picker, computed once from the index-aligned arrays
+MOVIE_OPTIONS = tuple(
+    (int(mid), title) for mid, title in zip(MAPPINGS["movie_ids"], MAPPINGS["movie_titles"])
+)
+
+# Genre list for the select box (the genre index's tokens), computed once
+GENRES = ["All"] + sorted(GENRE_TO_MOVIES)
+print(f"      ✓ {len(MOVIE_OPTIONS):,} movies, {len(GENRES) - 1} genres")
 print(f"      ✓ Ready to serve recommendations!\n")
 print("="*80)
 print("✅ SERVER INITIALIZATION COMPLETE")
 print("="*80)
 print()
 
-# Helper to get likers of a movie node (uses cache)
-def get_likers_of_movie_node(m_node: str) -> set:
-    return MOVIE_LIKERS_CACHE.get(m_node, set())
+# Two-hop users of a user and the supporter count of every movie (memoized per user)
+@lru_cache(maxsize=128)
+def _user_two_hop(u_idx: int) -> Tuple[np.ndarray, np.ndarray]:
+    return scoring_mod.two_hop_supporters(USER_CSR, MOVIE_CSR, u_idx)
 
 
-# Recommend movies for a given user node
+# Recommend movies for a given user node (results memoized per query; callers get fresh copies)
 def get_recommendations_for_user_node(user_node: str, top_n: int = 10, genre_filter: Optional[str] = None) -> List[Dict[str, Any]]:
-    # Movies already seen
-    seen = set()
-    for nbr in G.neighbors(user_node):
-        if G.nodes[nbr].get("bipartite") == "movie":
-            seen.add(nbr)
-
-    # Candidate movies
-    candidates = []
-    for m in MOVIE_NODES:
-        if m not in seen:
-            # optional genre filter
-            if genre_filter and genre_filter != "All":
-                genres = G.nodes[m].get("genres")
-                if not genres or genre_filter not in str(genres):
-                    continue
-            candidates.append(m)
+    return [dict(rec) for rec in _user_recommendations(user_node, int(top_n), genre_filter)]
 
-    results = []
-
-    # Users at distance 2 from the user
-    lengths_u = nx.single_source_shortest_path_length(G, source=user_node, cutoff=2)
-    two_hop_users = {n for n, dist in lengths_u.items() if dist == 2 and G.nodes[n].get("bipartite") == "user"}
 
-    for m in candidates:
-        # Jaccard score
-        jacc = scoring_mod.jaccard_2hop_score(user_node, m, G)
+# Top-N recommendations for a user node; the graph is static, so these are cached per query
+@lru_cache(maxsize=1024)
+def _user_recommendations(user_node: str, top_n: int, genre_filter: Optional[str]) -> Tuple[Dict[str, Any], ...]:
+    u_idx = USER_ID_TO_IDX[MAPPINGS["node_to_user_id"][user_node]]
 
-        # Supporters: users who liked the movie and intersection with two-hop users
-        likers = get_likers_of_movie_node(m)
-        supporters = two_hop_users & likers
-        common_2hop = len(supporters)
+    # Candidate pool: whole catalogue or the precomputed genre slice
+    pool = None
+    if genre_filter and genre_filter != "All":
+        pool = GENRE_TO_MOVIES.get(genre_filter, NO_MOVIES)
 
-        # Average rating among supporters
-        movie_id = MAPPINGS["node_to_movie_id"].get(m)
-        avg_rating = None
-        if movie_id is not None and supporters:
-            supporter_ids = [MAPPINGS["node_to_user_id"].get(u) for u in supporters]
-            rows = RATINGS_DF[(RATINGS_DF["movieId"] == movie_id) & (RATINGS_DF["userId"].isin(supporter_ids))]
-            if not rows.empty:
-                avg_rating = float(rows["rating"].mean())
+    # Shared CSR scorer (also used by test.py) with this process's cached two-hop data
+    two_hop, supporters = _user_two_hop(u_idx)
+    ranked = scoring_mod.recommend_for_user(MAPPINGS, u_idx, top_n, pool, two_hop, supporters)
 
+    results = []
+    for m_idx, jacc, common_2hop, avg_rating in ranked:
         results.append({
-            "movie_node": m,
-            "movie_id": movie_id,
-            "title": G.nodes[m].get("title"),
-            "genres": G.nodes[m].get("genres"),
+            "movie_node": MOVIE_NODES[m_idx],
+            "movie_id": int(MAPPINGS["movie_ids"][m_idx]),
+            "title": MAPPINGS["movie_titles"][m_idx],
+            "genres": MAPPINGS["movie_genres"][m_idx],
             "jaccard": jacc,
             "common_2hop": common_2hop,
             "avg_rating": avg_rating,
         })
+    return tuple(results)
+
+
+# Supporter counts and half-star sums for every movie, given a set of liked movie ids (memoized)
+@lru_cache(maxsize=256)
+def _liked_movies_supporters(liked_key: FrozenSet[int]) -> Tuple[List[int], int, np.ndarray, np.ndarray]:
+    # Map selected movie ids to compact movie indices
+    selected_idx = sorted(MOVIE_ID_TO_IDX[mid] for mid in liked_key if mid in MOVIE_ID_TO_IDX)
+
+    # Indicator vector over users who liked any of the selected movies (one row gather)
+    query = np.zeros(MOVIE_CSR.shape[1], dtype=np.int32)
+    query[MOVIE_CSR[selected_idx].indices] = 1
+    n_query_users = int(query.sum())
+
+    # One sparse mat-vec gives |likers ∩ user_set| for every movie at once,
+    # and the same mat-vec over the half-star matrix sums the supporters' ratings
+    intersection = MOVIE_CSR @ query
+    half_star_sums = MOVIE_HALF_STARS @ query
+    return selected_idx, n_query_users, intersection, half_star_sums
+
+
+# Score all candidates for a liked-movies query; top_n is applied by the caller (memoized)
+@lru_cache(maxsize=256)
+def _score_liked_movies(
+    liked_key: FrozenSet[int],
+    genre_filter: Optional[str],
+    rating_limit: float,
+    algorithm: str,
+    prioritize_rating: bool,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    selected_idx, n_query_users, intersection, half_star_sums = _liked_movies_supporters(liked_key)
+
+    # Candidates: unselected movies with at least one supporter, optionally genre-filtered
+    candidate_mask = intersection > 0
+    candidate_mask[selected_idx] = False
+    if genre_filter and genre_filter != "All":
+        genre_mask = np.zeros(len(candidate_mask), dtype=bool)
+        genre_mask[GENRE_TO_MOVIES.get(genre_filter, NO_MOVIES)] = True
+        candidate_mask &= genre_mask
+    candidates = np.flatnonzero(candidate_mask)
+
+    # Compute score based on algorithm
+    inter = intersection[candidates]
+    if algorithm == "cn":
+        scores = inter.astype(np.float64)
+    else:
+        # Jaccard
+        union = n_query_users + MOVIE_DEGREE[candidates] - inter
+        scores = inter / np.maximum(union, 1)
 
-    # Sort by jaccard then common_2hop
-    def _sort_key(item: Dict[str, Any]):
-        primary = item.get("jaccard") or 0.0
-        secondary = item.get("common_2hop") or 0
-        return (-primary, -secondary)
+    # Average rating among supporters (every candidate has at least one)
+    avg_ratings = half_star_sums[candidates] / (2.0 * inter)
 
-    results.sort(key=_sort_key)
+    # Apply rating limit filter
+    if rating_limit > 0.0:
+        keep = avg_ratings >= rating_limit
+        candidates, inter, scores, avg_ratings = candidates[keep], inter[keep], scores[keep], avg_ratings[keep]
 
-    return results[:top_n]
+    # Apply rating weight if prioritize_rating is True
+    final_scores = scores
+    if prioritize_rating:
+        final_scores = scores * (avg_ratings / 5.0)
 
+    return candidates, inter, scores, final_scores, avg_ratings
 
-# Recommend movies for a given user node or liked movies (OPTIMIZED)
+
+# Recommend movies for a set of liked movies (vectorized over all movies, memoized per query)
 def get_recommendations_for_liked_movies(
     liked_movie_ids: List[int], 
     top_n: int = 10, 
@@ -154,120 +220,87 @@ def get_recommendations_for_liked_movies(
     algorithm: str = "jaccard",
     prioritize_rating: bool = False
 ) -> List[Dict[str, Any]]:
-    # Build union of likers for selected movies (using cache)
-    selected_movie_nodes = [f"m_{mid}" for mid in liked_movie_ids if f"m_{mid}" in MOVIE_LIKERS_CACHE]
-    
-    # Fast union using set operations
-    user_set = set()
-    for m_node in selected_movie_nodes:
-        user_set.update(MOVIE_LIKERS_CACHE[m_node])
-
-    # Early exit if no users found
-    if not user_set:
-        return []
+    candidates, inter, scores, final_scores, avg_ratings = _score_liked_movies(
+        frozenset(liked_movie_ids), genre_filter, float(rating_limit), algorithm, bool(prioritize_rating)
+    )
 
-    # Build candidate list with genre pre-filtering
-    selected_set = set(selected_movie_nodes)
-    if genre_filter and genre_filter != "All":
-        candidates = [m for m in MOVIE_NODES 
-                     if m not in selected_set and genre_filter in MOVIE_GENRES_CACHE.get(m, set())]
-    else:
-        candidates = [m for m in MOVIE_NODES if m not in selected_set]
-    
-    # Pre-convert user nodes to IDs for rating lookups
-    user_ids = {MAPPINGS["node_to_user_id"][u] for u in user_set if u in MAPPINGS["node_to_user_id"]}
-    
+    # Select top N by final score and only build result dicts for those
     results = []
-    
-    for m in candidates:
-        # Get likers from cache
-        likers = MOVIE_LIKERS_CACHE.get(m, set())
-        
-        # Compute intersection once
-        intersection = user_set & likers
-        
-        # Skip if no intersection
-        if not intersection:
-            if algorithm == "jaccard":
-                score = 0.0
-            else:
-                score = 0
-            # Skip low scores early
-            if score == 0:
-                continue
-        else:
-            # Compute score based on algorithm
-            if algorithm == "cn":
-                score = len(intersection)
-            else:
-                # Jaccard
-                union_size = len(user_set) + len(likers) - len(intersection)
-                score = len(intersection) / union_size if union_size > 0 else 0.0
-        
-        # Fast rating calculation using lookup cache
-        avg_rating = None
-        movie_id = MAPPINGS["node_to_movie_id"].get(m)
-        
-        if movie_id and intersection:
-            supporter_ids = [MAPPINGS["node_to_user_id"][u] for u in intersection if u in MAPPINGS["node_to_user_id"]]
-            
-            # Use O(1) cache lookup for ratings
-            ratings = [RATINGS_LOOKUP.get((movie_id, uid)) for uid in supporter_ids]
-            ratings = [r for r in ratings if r is not None]
-            
-            if ratings:
-                avg_rating = sum(ratings) / len(ratings)
-        
-        # Apply rating limit filter
-        if rating_limit > 0.0 and (avg_rating is None or avg_rating < rating_limit):
-            continue
-        
-        # Apply rating weight if prioritize_rating is True
-        final_score = score
-        if prioritize_rating and avg_rating is not None:
-            rating_weight = avg_rating / 5.0
-            final_score = score * rating_weight
-        
+    for i in scoring_mod.top_n_indices(final_scores, top_n):
+        m_idx = candidates[i]
+        avg_rating = float(avg_ratings[i])
+        score = int(inter[i]) if algorithm == "cn" else float(scores[i])
         results.append({
-            "movie_node": m,
-            "movie_id": movie_id,
-            "title": G.nodes[m].get("title"),
-            "genres": G.nodes[m].get("genres"),
+            "movie_node": MOVIE_NODES[m_idx],
+            "movie_id": int(MAPPINGS["movie_ids"][m_idx]),
+            "title": MAPPINGS["movie_titles"][m_idx],
+            "genres": MAPPINGS["movie_genres"][m_idx],
             "jaccard": score if algorithm == "jaccard" else None,
-            "common_2hop": len(intersection),
+            "common_2hop": int(inter[i]),
             "avg_rating": avg_rating,
-            "score": final_score
+            "score": float(final_scores[i]) if prioritize_rating else score
         })
+    return results
+
+
+# Recommendation query stored in the session, as a hashable tuple of arguments
+def get_session_query() -> Tuple[Tuple[int, ...], int, str, float, str, bool]:
+    return (
+        tuple(session.get('liked_movies', [])),
+        session.get('top_n', 10),
+        session.get('genre', "All"),
+        session.get('rating_limit', 0.0),
+        session.get('algorithm', "jaccard"),
+        session.get('prioritize_rating', False),
+    )
+
+
+# Recompute recommendations for the query stored in the session (served from the LRU caches)
+def get_session_recommendations() -> List[Dict[str, Any]]:
+    liked_movie_ids, *options = get_session_query()
+    if not liked_movie_ids:
+        return []
+    return get_recommendations_for_liked_movies(list(liked_movie_ids), *options)
+
+
+# Plotly HTML and similar-user details for a query (rendering memoized; callers get fresh copies)
+def get_graph_page(query: Tuple) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    graph_html, similar_users_details = _graph_page(*query)
+    return graph_html, [dict(user, shared_movies=list(user["shared_movies"])) for user in similar_users_details]
+
+
+# Rendered graph for a query; the graph is static, so the HTML and details are cached per query
+@lru_cache(maxsize=64)
+def _graph_page(
+    liked_movie_ids: Tuple[int, ...],
+    top_n: int,
+    genre_filter: str,
+    rating_limit: float,
+    algorithm: str,
+    prioritize_rating: bool,
+) -> Tuple[Optional[str], Tuple[Dict[str, Any], ...]]:
+    results = get_recommendations_for_liked_movies(
+        list(liked_movie_ids), top_n, genre_filter, rating_limit, algorithm, prioritize_rating
+    )
+    if not results:
+        return None, ()
+
+    # Generate interactive graph
+    fig, similar_users_details = graphvis.create_bipartite_graph(
+        MAPPINGS, list(liked_movie_ids), results, top_n_similar=5
+    )
     
-    # Sort by final score descending and return top N
-    results.sort(key=lambda x: -x["score"])
-    return results[:top_n]
+    # Convert to HTML; the cached details hold tuples so shared entries stay unchanged
+    details = tuple(dict(user, shared_movies=tuple(user["shared_movies"])) for user in similar_users_details)
+    return fig.to_html(full_html=False, include_plotlyjs='cdn'), details
 
 
 @app.route("/", methods=["GET"])
 def index():
-    # Provide movie list
-    movie_options = []
-    for m in MOVIE_NODES:
-        mid = MAPPINGS["node_to_movie_id"].get(m)
-        title = G.nodes[m].get("title")
-        movie_options.append((mid, title))
-
-    # Simple genre list (collect a few from movies_df)
-    genres = ["All"]
-    if MOVIES_DF is not None and "genres" in MOVIES_DF.columns:
-        # collect unique genre tokens (split on |) — simple heuristic
-        gset = set()
-        for val in MOVIES_DF["genres"].dropna().unique():
-            parts = str(val).split("|")
-            for p in parts:
-                gset.add(p)
-        genres.extend(sorted(gset))
-
     # Restore liked movies from session if returning from results/graph page
     liked_movies_from_session = session.get('liked_movies', [])
     
-    return render_template("index.html", movies=movie_options, genres=genres, 
+    return render_template("index.html", movies=MOVIE_OPTIONS, genres=GENRES, 
                          results=None, liked_movies=liked_movies_from_session)
 
 
@@ -296,25 +329,14 @@ def recommend():
         session['algorithm'] = algorithm
         session['prioritize_rating'] = prioritize_rating
 
-        results = []
-        if liked_movie_ids:
-            results = get_recommendations_for_liked_movies(
-                liked_movie_ids, 
-                top_n=top_n, 
-                genre_filter=genre,
-                rating_limit=rating_limit,
-                algorithm=algorithm,
-                prioritize_rating=prioritize_rating
-            )
-        
-        # Store results in session for graph page
-        session['results'] = results
+        # Only the query is kept in the session; results are recomputed (memoized) when needed
+        results = get_session_recommendations()
 
         # Render recommendations page
         return render_template("recommendations.html", results=results)
     
-    else:  # GET request - retrieve from session
-        results = session.get('results', [])
+    else:  # GET request - recompute from the query stored in the session
+        results = get_session_recommendations()
         if not results:
             # No session data, redirect to home
             return render_template("recommendations.html", results=[], error="No recommendations found. Please select movies first.")
@@ -324,26 +346,20 @@ def recommend():
 
 @app.route("/graph", methods=["GET"])
 def graph():
-    # Get data from session
-    liked_movie_ids = session.get('liked_movies', [])
-    results = session.get('results', [])
+    # Rebuild (or reuse) the graph for the query stored in the session
+    query = get_session_query()
+    graph_html, similar_users_details = get_graph_page(query) if query[0] else (None, [])
     
-    if not liked_movie_ids or not results:
+    if graph_html is None:
         return render_template("graph.html", error="No recommendation data found. Please generate recommendations first.")
     
-    # Generate interactive graph
-    fig, similar_users_details = graphvis.create_bipartite_graph(
-        G, MAPPINGS, MOVIES_DF, liked_movie_ids, results, top_n_similar=5
-    )
-    
-    # Convert to HTML
-    graph_html = fig.to_html(full_html=False, include_plotlyjs='cdn')
-    
     return render_template("graph.html", graph_html=graph_html, similar_users=similar_users_details)
 
 
 if __name__ == "__main__":
+    # Local development server only; production runs through wsgi.py under gunicorn.
     # Debug mode should be False in production
     app.run(debug=os.environ.get('FLASK_DEBUG', 'False') == 'True', 
             host='0.0.0.0',
-            port=int(os.environ.get('PORT', 5000)))
+            port=int(os.environ.get('PORT', 5000)),
+            threaded=True)
@@ -0,0 +1,94 @@
+import json
+import os
+import pickle
+from typing import IO, Callable, Dict, Iterable, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+# Bump when the layout of the cached mappings changes
+CACHE_VERSION = 5
+
+MANIFEST_FILE = "manifest.json"
+MAPPINGS_FILE = "mappings.pkl"
+
+# Mapping entries stored as raw .npy arrays (memory-mapped on load)
+CSR_KEYS = ("user_csr", "movie_csr", "movie_half_stars")
+ARRAY_KEYS = ("user_ids", "movie_ids")
+
+# Describe the inputs a cached graph was built from (source files + build parameters)
+def graph_manifest(source_paths: Iterable[str], **params) -> Dict:
+    sources = {}
+    for path in source_paths:
+        stat = os.stat(path)
+        sources[os.path.abspath(path)] = [stat.st_mtime, stat.st_size]
+    return {"version": CACHE_VERSION, "sources": sources, "params": params}
+
+# Load the graph mappings from cache_dir if they were built from the same inputs;
+# a damaged or incomplete cache is reported and treated as a miss so the caller rebuilds it.
+# The NetworkX graph itself is not cached: the web app only needs the CSR mappings.
+def load_graph_cache(cache_dir: str, manifest: Dict) -> Optional[Dict]:
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path) as f:
+            stored = json.load(f)
+        for key in ("version", "sources", "params"):
+            if stored.get(key) != manifest[key]:
+                return None
+
+        with open(os.path.join(cache_dir, MAPPINGS_FILE), "rb") as f:
+            mappings = pickle.load(f)
+
+        # Numeric arrays are memory-mapped read-only, so forked workers share the pages
+        for key in CSR_KEYS:
+            parts = [np.load(os.path.join(cache_dir, f"{key}.{part}.npy"), mmap_mode="r")
+                     for part in ("data", "indices", "indptr")]
+            mappings[key] = sp.csr_matrix(tuple(parts), shape=tuple(stored["shapes"][key]), copy=False)
+        for key in ARRAY_KEYS:
+            mappings[key] = np.load(os.path.join(cache_dir, f"{key}.npy"), mmap_mode="r")
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError, ValueError) as e:
+        print(f"      ! Ignoring unreadable graph cache in {cache_dir}: {e!r}")
+        return None
+
+    return mappings
+
+# Write a file under a temporary name and move it into place, so concurrent writers
+# and readers never see a partially written file
+def _write_atomic(path: str, write: Callable[[IO], None], mode: str = "wb") -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Write the graph mappings to cache_dir; the manifest goes last so partial writes are never loaded
+def save_graph_cache(cache_dir: str, mappings: Dict, manifest: Dict) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Remove a stale manifest first so an interrupted save invalidates the cache
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    shapes = {}
+    for key in CSR_KEYS:
+        matrix = mappings[key]
+        shapes[key] = list(matrix.shape)
+        for part in ("data", "indices", "indptr"):
+            _write_atomic(os.path.join(cache_dir, f"{key}.{part}.npy"),
+                          lambda f: np.save(f, getattr(matrix, part)))
+    for key in ARRAY_KEYS:
+        _write_atomic(os.path.join(cache_dir, f"{key}.npy"), lambda f: np.save(f, mappings[key]))
+
+    # Everything else (dict mappings, node lists, object arrays) is pickled
+    rest = {k: v for k, v in mappings.items() if k not in CSR_KEYS and k not in ARRAY_KEYS}
+    _write_atomic(os.path.join(cache_dir, MAPPINGS_FILE),
+                  lambda f: pickle.dump(rest, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+    _write_atomic(manifest_path, lambda f: json.dump({**manifest, "shapes": shapes}, f, indent=2), mode="w")
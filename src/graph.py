@@ -1,7 +1,10 @@
-from typing import Dict, Tuple, Optional
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 import networkx as nx
+import scipy.sparse as sp
 
 # Load ratings and movies data from CSV files
 def load_data(ratings_path: str, movies_path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
@@ -40,21 +43,18 @@ def downsample_users(
     sample_n: Optional[int] = None,
 ) -> pd.DataFrame:
 
-    # Keep only positive interactions
-    positive = ratings[ratings["rating"] >= threshold].copy()
+    # Keep only positive interactions (boolean mask on the raw values, no intermediate copy)
+    positive = ratings[ratings["rating"].to_numpy() >= threshold]
 
     # Count positive likes per user
     counts = positive.groupby("userId").size()
 
-    # Build list of eligible users with enough likes
-    eligible_users = []
-    for user_id, cnt in counts.items():
-        if cnt >= min_likes:
-            eligible_users.append(user_id)
+    # Eligible users with enough likes (vectorized comparison)
+    eligible_users = counts.index[counts.to_numpy() >= min_likes]
 
     # Optionally downsample the eligible users
     if sample_n is not None and sample_n < len(eligible_users):
-        eligible_users = pd.Series(eligible_users).sample(sample_n, random_state=42).tolist()
+        eligible_users = pd.Series(eligible_users).sample(sample_n, random_state=42).to_numpy()
 
     # Filter positive interactions to only include eligible users
     filtered = positive[positive["userId"].isin(eligible_users)].copy()
@@ -69,30 +69,36 @@ def build_bipartite_graph(
 
     G = nx.Graph()
 
+    # Node lists per partition, recorded as nodes are added so nobody has to re-scan G
+    user_nodes = []
+    movie_nodes = []
+
     # Add user nodes from the ratings DataFrame
     unique_user_ids = ratings["userId"].unique()
     for uid in unique_user_ids:
         node_name = f"u_{uid}"
         G.add_node(node_name, bipartite="user", userId=int(uid))
-
-    # Add ALL movie nodes from movies DataFrame (not just those with ratings)
-    movies_index = movies.set_index("movieId")
-    for mid in movies["movieId"].unique():
+        user_nodes.append(node_name)
+
+    # Add ALL movie nodes from movies DataFrame (not just those with ratings);
+    # one row per movieId, read column-wise instead of a .loc lookup per movie
+    movies_unique = movies.drop_duplicates("movieId")
+    has_genres = "genres" in movies_unique.columns
+    movie_genres_col = movies_unique["genres"].tolist() if has_genres else None
+    for i, (mid, title) in enumerate(zip(movies_unique["movieId"].tolist(), movies_unique["title"].tolist())):
         node_name = f"m_{mid}"
-        attrs = {"bipartite": "movie", "movieId": int(mid)}
-        if mid in movies_index.index:
-            movie_row = movies_index.loc[mid]
-            attrs["title"] = movie_row.get("title")
-            if "genres" in movies_index.columns:
-                attrs["genres"] = movie_row.get("genres")
+        attrs = {"bipartite": "movie", "movieId": int(mid), "title": title}
+        if has_genres:
+            attrs["genres"] = movie_genres_col[i]
         G.add_node(node_name, **attrs)
+        movie_nodes.append(node_name)
 
-    # Add edges for positive ratings (above threshold)
+    # Add edges for positive ratings (above threshold), node names built column-wise
     positive_ratings = ratings[ratings["rating"] >= threshold]
-    for _, row in positive_ratings.iterrows():
-        u_node = f"u_{int(row['userId'])}"
-        m_node = f"m_{int(row['movieId'])}"
-        G.add_edge(u_node, m_node, weight=float(row["rating"]))
+    u_nodes = ("u_" + positive_ratings["userId"].astype(int).astype(str)).tolist()
+    m_nodes = ("m_" + positive_ratings["movieId"].astype(int).astype(str)).tolist()
+    weights = positive_ratings["rating"].astype(float).tolist()
+    G.add_weighted_edges_from(zip(u_nodes, m_nodes, weights))
 
     # Build helper mappings explicitly (clear and easy to follow)
     user_id_to_node = {}
@@ -100,46 +106,111 @@ def build_bipartite_graph(
     movie_id_to_node = {}
     node_to_movie_id = {}
 
-    for node, data in G.nodes(data=True):
-        part = data.get("bipartite")
-        if part == "user":
-            # node is like 'u_123' -> extract numeric id
-            uid = int(node.split("_")[1])
-            user_id_to_node[uid] = node
-            node_to_user_id[node] = uid
-        elif part == "movie":
-            mid = int(node.split("_")[1])
-            movie_id_to_node[mid] = node
-            node_to_movie_id[node] = mid
+    for node in user_nodes:
+        # node is like 'u_123' -> extract numeric id
+        uid = int(node.split("_")[1])
+        user_id_to_node[uid] = node
+        node_to_user_id[node] = uid
+    for node in movie_nodes:
+        mid = int(node.split("_")[1])
+        movie_id_to_node[mid] = node
+        node_to_movie_id[node] = mid
+
+    # Compact int32 indices in the same order as the node lists:
+    # users in first-seen order, movies in movies-file order
+    user_ids = unique_user_ids
+    movie_ids = movies_unique["movieId"].to_numpy()
+    edges = positive_ratings.drop_duplicates(["userId", "movieId"], keep="last")
+    u_idx = pd.Index(user_ids).get_indexer(edges["userId"]).astype(np.int32)
+    m_idx = pd.Index(movie_ids).get_indexer(edges["movieId"]).astype(np.int32)
+    half_stars = edges["rating"].to_numpy() * 2
+
+    # Drop edges to movies missing from the movies file (they have no movie node attributes)
+    keep = m_idx >= 0
+    u_idx, m_idx, half_stars = u_idx[keep], m_idx[keep], half_stars[keep]
+
+    # Ratings are stored as int8 half-stars (rating * 2): 1 byte per edge instead of a float
+    if not np.array_equal(half_stars, np.round(half_stars)):
+        raise ValueError("Ratings must be multiples of 0.5 to be stored as half-stars")
+    movie_half_stars = sp.coo_matrix(
+        (half_stars.astype(np.int8), (m_idx, u_idx)), shape=(len(movie_ids), len(user_ids))
+    ).tocsr()
+
+    # Binary CSR adjacency in both directions; movies -> users shares the ratings' structure,
+    # so a movie's likers line up with its half-star values
+    movie_csr = sp.csr_matrix(
+        (np.ones(movie_half_stars.nnz, dtype=np.int32), movie_half_stars.indices, movie_half_stars.indptr),
+        shape=movie_half_stars.shape,
+    )
+    user_csr = movie_csr.T.tocsr()
+
+    # Movie attributes as arrays aligned with the movie index
+    movie_titles = movies_unique["title"].to_numpy(dtype=object)
+    if has_genres:
+        movie_genres = movies_unique["genres"].to_numpy(dtype=object)
+    else:
+        movie_genres = np.full(len(movie_ids), None, dtype=object)
 
     mappings = {
         "user_id_to_node": user_id_to_node,
         "node_to_user_id": node_to_user_id,
         "movie_id_to_node": movie_id_to_node,
         "node_to_movie_id": node_to_movie_id,
+        "user_nodes": user_nodes,
+        "movie_nodes": movie_nodes,
+        "user_ids": np.asarray(user_ids, dtype=np.int64),
+        "movie_ids": np.asarray(movie_ids, dtype=np.int64),
+        "user_id_to_idx": {int(uid): idx for idx, uid in enumerate(user_ids)},
+        "movie_id_to_idx": {int(mid): idx for idx, mid in enumerate(movie_ids)},
+        "user_csr": user_csr,
+        "movie_csr": movie_csr,
+        "movie_half_stars": movie_half_stars,
+        "movie_titles": movie_titles,
+        "movie_genres": movie_genres,
     }
 
     return G, mappings
 
-# Validate bipartite graph structure
-def validate_graph(G: nx.Graph) -> None:
+# Inverted genre index: genre -> int32 array of movie indices (from mappings["movie_genres"])
+def build_genre_index(movie_genres: Sequence) -> Dict[str, np.ndarray]:
 
-    user_nodes = []
-    movie_nodes = []
-    for n, d in G.nodes(data=True):
-        if d.get("bipartite") == "user":
-            user_nodes.append(n)
-        elif d.get("bipartite") == "movie":
-            movie_nodes.append(n)
+    # Split each "|"-separated genre string once; movies without genres are skipped
+    genre_to_movies = defaultdict(list)
+    for m_idx, genres_str in enumerate(movie_genres):
+        if isinstance(genres_str, str):
+            for genre in set(genres_str.split("|")):
+                genre_to_movies[genre].append(m_idx)
+    return {g: np.asarray(idx, dtype=np.int32) for g, idx in genre_to_movies.items()}
+
+# Validate bipartite graph structure
+def validate_graph(
+    G: nx.Graph,
+    user_nodes: Optional[List[str]] = None,
+    movie_nodes: Optional[List[str]] = None,
+) -> None:
+
+    # Fall back to scanning node attributes when the partition lists are not supplied
+    if user_nodes is None or movie_nodes is None:
+        user_nodes = []
+        movie_nodes = []
+        for n, d in G.nodes(data=True):
+            if d.get("bipartite") == "user":
+                user_nodes.append(n)
+            elif d.get("bipartite") == "movie":
+                movie_nodes.append(n)
 
     ucount = len(user_nodes)
     mcount = len(movie_nodes)
     ecount = G.number_of_edges()
     print(f"Graph: {ucount} users, {mcount} movies, {ecount} edges")
 
+    # Partition per node from the cached lists (one dict get per endpoint, no attribute fetch)
+    partition = dict.fromkeys(user_nodes, "user")
+    partition.update(dict.fromkeys(movie_nodes, "movie"))
+
     # Ensure edges only connect user <-> movie
     for u, v in G.edges():
-        bu = G.nodes[u].get("bipartite")
-        bv = G.nodes[v].get("bipartite")
+        bu = partition.get(u)
+        bv = partition.get(v)
         if bu == bv:
             raise AssertionError(f"Edge between same partition: {u}({bu}) - {v}({bv})")
@@ -1,12 +1,13 @@
 # Graph Visualization Module for Web Application
+import numpy as np
 import plotly.graph_objects as go
 import networkx as nx
 from typing import List, Dict, Any, Tuple
 
+from src import scoring
+
 def create_bipartite_graph(
-    G,
-    mappings: Dict[str, Dict],
-    movies_df,
+    mappings: Dict[str, Any],
     liked_movie_ids: List[int],
     recommended_movies: List[Dict[str, Any]],
     top_n_similar: int = 5
@@ -19,37 +20,33 @@ def create_bipartite_graph(
         - List of similar users with details
     """
     
-    # Get movie titles helper
+    user_csr = mappings['user_csr']
+    movie_csr = mappings['movie_csr']
+    movie_id_to_idx = mappings['movie_id_to_idx']
+    user_ids = mappings['user_ids']
+    movie_titles = mappings['movie_titles']
+
+    # Get movie titles helper (title array indexed by compact movie index)
     def get_movie_title(movie_node):
-        movie_id = mappings['node_to_movie_id'].get(movie_node)
-        if movie_id and movie_id in movies_df['movieId'].values:
-            return movies_df[movies_df['movieId'] == movie_id]['title'].values[0]
-        return movie_node
+        m_idx = movie_id_to_idx.get(mappings['node_to_movie_id'].get(movie_node))
+        return movie_node if m_idx is None else movie_titles[m_idx]
     
+    # Movies a user liked, as a set of compact movie indices (one CSR row slice)
+    def liked_movie_indices(user_node):
+        u_idx = mappings['user_id_to_idx'][mappings['node_to_user_id'][user_node]]
+        return set(user_csr.indices[user_csr.indptr[u_idx]:user_csr.indptr[u_idx + 1]].tolist())
+
     # Convert liked movie IDs to nodes
-    liked_movie_nodes = [f"m_{mid}" for mid in liked_movie_ids if f"m_{mid}" in G]
-    
-    # Find users who liked these movies (similar users)
-    user_set = set()
-    for m_node in liked_movie_nodes:
-        if m_node in G:
-            for nbr in G.neighbors(m_node):
-                if G.nodes[nbr].get("bipartite") == "user":
-                    user_set.add(nbr)
-    
-    # Calculate similarity scores for users
-    user_similarity = {}
-    for user in user_set:
-        shared_count = 0
-        for m_node in liked_movie_nodes:
-            if m_node in G and G.has_edge(user, m_node):
-                shared_count += 1
-        if shared_count > 0:
-            user_similarity[user] = shared_count
-    
-    # Get top N similar users
-    similar_users_sorted = sorted(user_similarity.items(), key=lambda x: x[1], reverse=True)[:top_n_similar]
+    liked_movie_nodes = [f"m_{mid}" for mid in liked_movie_ids if mid in movie_id_to_idx]
+    liked_idx = [movie_id_to_idx[mid] for mid in liked_movie_ids if mid in movie_id_to_idx]
+    
+    # Similarity of every user = number of selected movies they liked (one pass over the CSR rows)
+    shared_counts = np.bincount(movie_csr[liked_idx].indices, minlength=user_csr.shape[0])
+    top_users = scoring.top_n_indices(shared_counts, top_n_similar)
+    top_users = top_users[shared_counts[top_users] > 0]
+    similar_users_sorted = [(f"u_{user_ids[u]}", int(shared_counts[u])) for u in top_users]
     similar_user_nodes = [u for u, _ in similar_users_sorted]
+    similar_user_movies = {u: liked_movie_indices(u) for u in similar_user_nodes}
     
     # Get recommended movie nodes
     recommended_movie_nodes = [rec['movie_node'] for rec in recommended_movies[:10]]  # Top 10 for visualization
@@ -70,21 +67,19 @@ def create_bipartite_graph(
     
     # Add liked movies
     for m in liked_movie_nodes:
-        if m in G:
-            title = get_movie_title(m)
-            viz_graph.add_node(m, bipartite='movie', label=title, movie_type='liked')
-            viz_graph.add_edge(virtual_user, m)  # Connect virtual user to liked movies
+        title = get_movie_title(m)
+        viz_graph.add_node(m, bipartite='movie', label=title, movie_type='liked')
+        viz_graph.add_edge(virtual_user, m)  # Connect virtual user to liked movies
     
     # Add recommended movies
     for m in recommended_movie_nodes:
-        if m in G:
-            title = get_movie_title(m)
-            viz_graph.add_node(m, bipartite='movie', label=title, movie_type='recommended')
+        title = get_movie_title(m)
+        viz_graph.add_node(m, bipartite='movie', label=title, movie_type='recommended')
     
     # Add edges from similar users to all movies (liked and recommended)
     for u in similar_user_nodes:
         for m in liked_movie_nodes + recommended_movie_nodes:
-            if m in G and G.has_edge(u, m):
+            if movie_id_to_idx.get(mappings['node_to_movie_id'].get(m)) in similar_user_movies[u]:
                 viz_graph.add_edge(u, m)
     
     # Create bipartite layout
@@ -216,8 +211,8 @@ def create_bipartite_graph(
         
         # Get shared movie titles
         shared_movies = []
-        for m_node in liked_movie_nodes:
-            if m_node in G and G.has_edge(user_node, m_node):
+        for m_node, m_idx in zip(liked_movie_nodes, liked_idx):
+            if m_idx in similar_user_movies[user_node]:
                 shared_movies.append(get_movie_title(m_node))
         
         similar_users_details.append({
@@ -1,6 +1,24 @@
-from typing import List, Set, Dict
+from functools import lru_cache
+from typing import Any, List, Set, Dict, FrozenSet, Optional, Tuple
+import numpy as np
 import networkx as nx
 
+# Users two hops from a user: likers of the user's movies, excluding the user
+@lru_cache(maxsize=32)
+def users_two_hop(user_node: str, G: nx.Graph) -> FrozenSet[str]:
+    """
+    Union of the movie neighbors' neighbors, minus the user itself.
+
+    Equivalent to the distance-2 nodes of a cutoff=2 BFS (edges only join users
+    and movies, so these are all users) without building the BFS length dict.
+    Memoized per (user_node, G), so the graph must not be mutated afterwards.
+    """
+    users_2hop = set()
+    for movie in G.neighbors(user_node):
+        users_2hop.update(G.neighbors(movie))
+    users_2hop.discard(user_node)
+    return frozenset(users_2hop)
+
 # Optimized 2-hop Jaccard score between user node and movie node
 def jaccard_2hop_score(user_node: str, movie_node: str, G: nx.Graph, 
                        users_2hop: Set[str] = None, likers: Set[str] = None) -> float:
@@ -14,20 +32,21 @@ def jaccard_2hop_score(user_node: str, movie_node: str, G: nx.Graph,
 
     # Use pre-computed sets if provided, otherwise compute
     if users_2hop is None:
-        lengths_u = nx.single_source_shortest_path_length(G, source=user_node, cutoff=2)
-        users_2hop = {n for n, d in lengths_u.items() if d == 2 and G.nodes[n].get("bipartite") == "user"}
+        users_2hop = users_two_hop(user_node, G)
     
     if likers is None:
-        # Direct neighbors are more efficient than shortest path for distance 1
-        likers = {n for n in G.neighbors(movie_node) if G.nodes[n].get("bipartite") == "user"}
+        # Direct neighbors of a movie are always users in the bipartite graph
+        likers = set(G.neighbors(movie_node))
 
-    # Fast intersection and union
-    intersection = users_2hop & likers
-    union_size = len(users_2hop) + len(likers) - len(intersection)
-    
-    if union_size == 0:
+    return _jaccard(users_2hop, likers)
+
+# Jaccard of two sets (shared by the single and batch scorers)
+def _jaccard(users_2hop: Set[str], likers: Set[str]) -> float:
+    # Most movies share no two-hop users: score 0 without computing a union
+    intersection_size = len(users_2hop & likers)
+    if intersection_size == 0:
         return 0.0
-    return len(intersection) / union_size
+    return intersection_size / (len(users_2hop) + len(likers) - intersection_size)
 
 # Optimized common neighbors count
 def common_neighbors_count(user_node: str, movie_node: str, G: nx.Graph,
@@ -42,11 +61,10 @@ def common_neighbors_count(user_node: str, movie_node: str, G: nx.Graph,
 
     # Use pre-computed sets if provided, otherwise compute
     if users_2hop is None:
-        lengths_u = nx.single_source_shortest_path_length(G, source=user_node, cutoff=2)
-        users_2hop = {n for n, d in lengths_u.items() if d == 2 and G.nodes[n].get("bipartite") == "user"}
+        users_2hop = users_two_hop(user_node, G)
     
     if likers is None:
-        likers = {n for n in G.neighbors(movie_node) if G.nodes[n].get("bipartite") == "user"}
+        likers = set(G.neighbors(movie_node))
 
     return len(users_2hop & likers)
 
@@ -67,24 +85,111 @@ def batch_score(user_node: str, candidate_movies: List[str], G: nx.Graph,
         raise KeyError(f"user_node '{user_node}' not in graph")
     
     # Pre-compute 2-hop users once for all candidates
-    lengths_u = nx.single_source_shortest_path_length(G, source=user_node, cutoff=2)
-    users_2hop = {n for n, d in lengths_u.items() if d == 2 and G.nodes[n].get("bipartite") == "user"}
+    users_2hop = users_two_hop(user_node, G)
     
+    use_jaccard = method.lower() == "jaccard"
     scores = {}
     for movie_node in candidate_movies:
         if movie_node not in G:
             scores[movie_node] = 0.0
             continue
         
-        # Get likers efficiently
-        likers = {n for n in G.neighbors(movie_node) if G.nodes[n].get("bipartite") == "user"}
-        
-        # Calculate score
-        if method.lower() == "jaccard":
-            intersection = users_2hop & likers
-            union_size = len(users_2hop) + len(likers) - len(intersection)
-            scores[movie_node] = len(intersection) / union_size if union_size > 0 else 0.0
+        # Movie neighbors are always users, so no partition check is needed
+        likers = set(G.neighbors(movie_node))
+        if use_jaccard:
+            scores[movie_node] = _jaccard(users_2hop, likers)
         else:  # common neighbors
             scores[movie_node] = float(len(users_2hop & likers))
     
-    return scores
\ No newline at end of file
+    return scores
+
+# Top-N selection without a full sort
+def top_n_indices(scores: np.ndarray, top_n: int, secondary: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Return indices of the top_n highest scores in descending order.
+
+    Uses np.argpartition (O(N)) and only sorts the survivors. Ties are broken by
+    the optional secondary key (descending), then by position, so the result
+    matches a stable sort on (-scores, -secondary).
+    """
+    n = len(scores)
+    if top_n <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if top_n < n:
+        # Keep everything scoring at least the k-th best value (ties included)
+        kth = np.argpartition(-scores, top_n - 1)[top_n - 1]
+        survivors = np.flatnonzero(scores >= scores[kth])
+    else:
+        survivors = np.arange(n)
+
+    if secondary is None:
+        order = np.lexsort((survivors, -scores[survivors]))
+    else:
+        order = np.lexsort((survivors, -secondary[survivors], -scores[survivors]))
+    return survivors[order][:top_n]
+
+# Users two hops from a user over the CSR adjacency, and every movie's supporter count
+def two_hop_supporters(user_csr, movie_csr, u_idx: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Boolean indicator over users at distance 2 from user u_idx (likers of the
+    user's movies, minus the user) and how many of them liked each movie.
+    """
+    user_movies_idx = user_csr.indices[user_csr.indptr[u_idx]:user_csr.indptr[u_idx + 1]]
+    two_hop = np.zeros(user_csr.shape[0], dtype=bool)
+    two_hop[movie_csr[user_movies_idx].indices] = True
+    two_hop[u_idx] = False
+
+    # One mat-vec gives every movie's supporter count
+    supporters = movie_csr @ two_hop.astype(np.int32)
+    return two_hop, supporters
+
+# Top-N unseen movies for a user by 2-hop Jaccard over the CSR adjacency
+def recommend_for_user(mappings: Dict[str, Any], u_idx: int, top_n: int,
+                       pool: Optional[np.ndarray] = None,
+                       two_hop: Optional[np.ndarray] = None,
+                       supporters: Optional[np.ndarray] = None) -> List[Tuple[int, float, int, Optional[float]]]:
+    """
+    Rank movies the user has not liked by the Jaccard score between the user's
+    two-hop users and each movie's likers, ties broken by supporter count.
+
+    pool restricts the candidates (e.g. a genre's movie indices); two_hop and
+    supporters can be passed in when the caller caches them. Returns
+    (movie_idx, jaccard, common_2hop, avg_rating) tuples, best first.
+    """
+    user_csr = mappings["user_csr"]
+    movie_csr = mappings["movie_csr"]
+    movie_half_stars = mappings["movie_half_stars"]
+
+    # Candidates: the pool (default: every movie) minus movies the user already liked
+    n_movies = movie_csr.shape[0]
+    if pool is None:
+        pool = np.arange(n_movies, dtype=np.int32)
+    seen = np.zeros(n_movies, dtype=bool)
+    seen[user_csr.indices[user_csr.indptr[u_idx]:user_csr.indptr[u_idx + 1]]] = True
+    candidates = pool[~seen[pool]]
+
+    if two_hop is None:
+        two_hop, supporters = two_hop_supporters(user_csr, movie_csr, u_idx)
+    elif supporters is None:
+        supporters = movie_csr @ two_hop.astype(np.int32)
+
+    # Jaccard over the two-hop users and each candidate's likers
+    common = supporters[candidates]
+    union = int(two_hop.sum()) + np.diff(movie_csr.indptr)[candidates] - common
+    jacc = common / np.maximum(union, 1)
+
+    ranked = []
+    for i in top_n_indices(jacc, top_n, secondary=common):
+        m_idx = int(candidates[i])
+        count = int(common[i])
+
+        # Average rating among supporters, only for returned movies that have any
+        avg_rating = None
+        if count:
+            start, end = movie_csr.indptr[m_idx], movie_csr.indptr[m_idx + 1]
+            is_supporter = two_hop[movie_csr.indices[start:end]]
+            avg_rating = float(movie_half_stars.data[start:end][is_supporter].sum()) / (2.0 * count)
+
+        ranked.append((m_idx, float(jacc[i]), count, avg_rating))
+    return ranked
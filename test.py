@@ -9,8 +9,13 @@
 # =============================================================================
 
 # Default Imports
+import random
+from functools import lru_cache
+
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
 import networkx as nx
+import numpy as np
 
 # File Imports
 from src import graph as graph_mod
@@ -36,9 +41,10 @@ print("\n[3/5] 🔗 Building bipartite graph...")
 G, mappings = graph_mod.build_bipartite_graph(ratings_filtered, movies_df, threshold=3.5)
 print(f"      ✓ Graph created with {G.number_of_nodes():,} nodes and {G.number_of_edges():,} edges")
 
-# Get user and movie nodes
-user_nodes = [n for n, d in G.nodes(data=True) if d.get('bipartite') == 'user']
-movie_nodes = [n for n, d in G.nodes(data=True) if d.get('bipartite') == 'movie']
+# Get user and movie nodes (recorded at build time) and a set for partition checks
+user_nodes = mappings['user_nodes']
+movie_nodes = mappings['movie_nodes']
+movie_set = set(movie_nodes)
 print(f"      ✓ Users: {len(user_nodes):,}, Movies: {len(movie_nodes):,}")
 
 # ============================================================================
@@ -47,29 +53,22 @@ print(f"      ✓ Users: {len(user_nodes):,}, Movies: {len(movie_nodes):,}")
 
 print("\n[4/5] ⚡ Building performance caches...")
 
-# Cache: movie_node -> set of user nodes who liked it
-print("      - Building movie likers cache...")
-movie_likers_cache = {}
-for m_node in movie_nodes:
-    movie_likers_cache[m_node] = {nbr for nbr in G.neighbors(m_node) if G.nodes[nbr].get("bipartite") == "user"}
+# CSR adjacency over compact indices (user_nodes / movie_nodes order)
+print("      - Using CSR adjacency from the graph build...")
+user_csr = mappings['user_csr']
+movie_csr = mappings['movie_csr']
 
-# Cache: (movie_id, user_id) -> rating for O(1) lookups
-print("      - Building ratings lookup cache...")
-ratings_lookup = {}
-for _, row in ratings_df.iterrows():
-    ratings_lookup[(int(row['movieId']), int(row['userId']))] = float(row['rating'])
+# Cache: genre -> array of movie indices carrying that genre (inverted index, shared with app.py)
+print("      - Building genre index...")
+genre_to_movies = graph_mod.build_genre_index(mappings['movie_genres'])
 
-# Cache: movie_node -> genres set for faster filtering
-print("      - Building genres cache...")
-movie_genres_cache = {}
-for m_node in movie_nodes:
-    genres_str = G.nodes[m_node].get("genres")
-    if genres_str:
-        movie_genres_cache[m_node] = set(str(genres_str).split('|'))
-    else:
-        movie_genres_cache[m_node] = set()
+# Cache: movie_id -> title (first occurrence, like the old DataFrame scan)
+print("      - Building movie titles cache...")
+title_by_id = {}
+for mid, title in zip(movies_df['movieId'].tolist(), movies_df['title'].tolist()):
+    title_by_id.setdefault(mid, title)
 
-print(f"      ✓ Caches built: {len(movie_likers_cache):,} movies, {len(ratings_lookup):,} ratings")
+print(f"      ✓ Caches built: {len(movie_nodes):,} movies, {movie_csr.nnz:,} ratings")
 
 print("\n[5/5] 🎯 Initialization complete!\n")
 print("="*80)
@@ -77,87 +76,51 @@ print("✅ READY FOR TESTING")
 print("="*80)
 print()
 
-# Get movie title
+# Get movie title (dict lookup instead of scanning movies_df)
 def get_movie_title(movie_node):
     movie_id = mappings['node_to_movie_id'].get(movie_node)
-    if movie_id and movie_id in movies_df['movieId'].values:
-        return movies_df[movies_df['movieId'] == movie_id]['title'].values[0]
-    return movie_node
+    return title_by_id.get(movie_id, movie_node)
+
+# Shared-movie counts between a user and every other user (one CSR gather, cached per user)
+@lru_cache(maxsize=128)
+def shared_movie_counts(user_node):
+    u_idx = mappings['user_id_to_idx'][mappings['node_to_user_id'][user_node]]
+    user_movies_idx = user_csr.indices[user_csr.indptr[u_idx]:user_csr.indptr[u_idx + 1]]
+    shared = np.bincount(movie_csr[user_movies_idx].indices, minlength=user_csr.shape[0])
+    shared[u_idx] = 0
+    return shared
 
 # Find similar users (OPTIMIZED)
 def find_similar_users(user_node, top_n=5):
-    # Get movies liked by user from cache
-    user_movies = [m for m in G.neighbors(user_node) if G.nodes[m].get('bipartite') == 'movie']
-    
-    # Find users at distance 2 (via shared movies) using cache
-    user_similarity = {}
-    for movie in user_movies:
-        # Use cached likers instead of graph traversal
-        for other_user in movie_likers_cache.get(movie, set()):
-            if other_user != user_node:
-                if other_user not in user_similarity:
-                    user_similarity[other_user] = 0
-                user_similarity[other_user] += 1
-    
-    # Sort by number of shared movies
-    similar = sorted(user_similarity.items(), key=lambda x: x[1], reverse=True)[:top_n]
-    return similar
+    # Number of shared movies with every user; users sharing none are not similar
+    shared = shared_movie_counts(user_node)
+    top = scoring_mod.top_n_indices(shared, top_n)
+    return [(user_nodes[i], int(shared[i])) for i in top if shared[i] > 0]
 
-# Get recommendations (OPTIMIZED)
+# Get recommendations (OPTIMIZED, same CSR scorer as the web app)
 def get_recommendations(user_node, top_k=10, genre_filter=None):
-    # Movies already seen
-    seen = {m for m in G.neighbors(user_node) if G.nodes[m].get('bipartite') == 'movie'}
+    u_idx = mappings['user_id_to_idx'][mappings['node_to_user_id'][user_node]]
     
-    # Candidate movies with optional genre filter
+    # Candidate pool: the genre's index slice, or all movies
+    pool = None
     if genre_filter and genre_filter != "All":
-        candidates = [m for m in movie_nodes 
-                     if m not in seen and genre_filter in movie_genres_cache.get(m, set())]
-    else:
-        candidates = [m for m in movie_nodes if m not in seen]
+        pool = genre_to_movies.get(genre_filter, np.empty(0, dtype=np.int32))
     
-    # Pre-compute 2-hop users once
-    lengths_u = nx.single_source_shortest_path_length(G, source=user_node, cutoff=2)
-    users_2hop = {n for n, d in lengths_u.items() if d == 2 and G.nodes[n].get("bipartite") == "user"}
+    # 2-hop users are exactly the users sharing a movie (same pass as find_similar_users)
+    users_2hop = shared_movie_counts(user_node) > 0
+    ranked = scoring_mod.recommend_for_user(mappings, u_idx, top_k, pool, two_hop=users_2hop)
     
-    # Calculate scores using cache
     results = []
-    for m in candidates:
-        # Get likers from cache
-        likers = movie_likers_cache.get(m, set())
-        
-        # Calculate intersection
-        intersection = users_2hop & likers
-        
-        # Jaccard score
-        if not intersection:
-            jacc = 0.0
-        else:
-            union_size = len(users_2hop) + len(likers) - len(intersection)
-            jacc = len(intersection) / union_size if union_size > 0 else 0.0
-        
-        cn = len(intersection)
-        
-        # Calculate average rating using cache
-        avg_rating = None
-        movie_id = mappings['node_to_movie_id'].get(m)
-        if movie_id and intersection:
-            supporter_ids = [mappings['node_to_user_id'][u] for u in intersection if u in mappings['node_to_user_id']]
-            ratings_list = [ratings_lookup.get((movie_id, uid)) for uid in supporter_ids]
-            ratings_list = [r for r in ratings_list if r is not None]
-            if ratings_list:
-                avg_rating = sum(ratings_list) / len(ratings_list)
-        
+    for m_idx, jacc, common, avg_rating in ranked:
+        m = movie_nodes[m_idx]
         results.append({
             'movie_node': m,
             'jaccard': jacc,
-            'common_neighbors': cn,
+            'common_neighbors': common,
             'title': get_movie_title(m),
             'avg_rating': avg_rating
         })
-    
-    # Sort by jaccard then common neighbors
-    results.sort(key=lambda x: (-x['jaccard'], -x['common_neighbors']))
-    return results[:top_k]
+    return results
 
 # Display user info
 def display_user_info(user_node='u_1', top_k=10):
@@ -172,7 +135,7 @@ def display_user_info(user_node='u_1', top_k=10):
     print("="*80)
     
     # Show neighbors (movies user liked)
-    neighbors = [m for m in G.neighbors(user_node) if G.nodes[m].get('bipartite') == 'movie']
+    neighbors = [m for m in G.neighbors(user_node) if m in movie_set]
     print(f"\n📽️  MOVIES LIKED BY USER ({len(neighbors)} total):")
     print("-" * 80)
     for i, movie in enumerate(neighbors[:15], 1):  # Show first 15
@@ -185,12 +148,12 @@ def display_user_info(user_node='u_1', top_k=10):
     similar = find_similar_users(user_node, top_n=5)
     print(f"\n👥 SIMILAR USERS (sharing common movie interests):")
     print("-" * 80)
+    user_movies = set(neighbors)  # loop-invariant, built once
     for i, (other_user, shared_count) in enumerate(similar, 1):
         other_id = mappings['node_to_user_id'].get(other_user)
         print(f"  {i}. {other_user} (ID: {other_id}) - {shared_count} shared movies")
         # Show some shared movies
-        user_movies = set(m for m in G.neighbors(user_node) if G.nodes[m].get('bipartite') == 'movie')
-        other_movies = set(m for m in G.neighbors(other_user) if G.nodes[m].get('bipartite') == 'movie')
+        other_movies = set(m for m in G.neighbors(other_user) if m in movie_set)
         shared = user_movies & other_movies
         shared_titles = [get_movie_title(m) for m in list(shared)[:3]]
         print(f"     Shared: {', '.join(shared_titles)}")
@@ -210,10 +173,16 @@ def display_user_info(user_node='u_1', top_k=10):
     print("\n📊 Generating visualization...")
     visualize_user_neighborhood(user_node, recommendations)
 
+# Maximum number of watched movies drawn in the neighborhood plot
+MAX_VIZ_WATCHED = 20
+
 # Visualize user neighborhood and recommendations
 def visualize_user_neighborhood(user_node, top_recommendations):
-    # Get watched movies
-    watched_movies = [m for m in G.neighbors(user_node) if G.nodes[m].get('bipartite') == 'movie']
+    # Get watched movies; heavy users are sampled down so layout and drawing stay fast
+    watched_movies = [m for m in G.neighbors(user_node) if m in movie_set]
+    n_watched = len(watched_movies)
+    if n_watched > MAX_VIZ_WATCHED:
+        watched_movies = random.Random(42).sample(watched_movies, MAX_VIZ_WATCHED)
     
     # Get recommended movie nodes
     recommended_movie_nodes = [rec['movie_node'] for rec in top_recommendations]
@@ -250,21 +219,26 @@ def visualize_user_neighborhood(user_node, top_recommendations):
     # Create figure
     plt.figure(figsize=(20, 12))
     
-    # Draw selected user (yellow circle)
-    nx.draw_networkx_nodes(viz_graph, pos, nodelist=[user_node], node_color='lightgreen', node_size=600, 
-                          label='Selected User', node_shape='o', edgecolors='black', linewidths=2)
-    
-    # Draw similar users (green circles)
-    nx.draw_networkx_nodes(viz_graph, pos, nodelist=similar_user_nodes, node_color='lightblue', node_size=600, 
-                          label='Similar Users', node_shape='o', edgecolors='black', linewidths=2)
-    
-    # Draw watched movies (blue squares)
-    nx.draw_networkx_nodes(viz_graph, pos, nodelist=watched_movies, node_color='gray', node_size=500, 
-                          label='Already Watched', node_shape='s', edgecolors='black', linewidths=2)
+    # Draw nodes with one scatter per marker shape (users = circles, movies = squares)
+    node_groups = [
+        ([user_node] + similar_user_nodes,
+         ['lightgreen'] + ['lightblue'] * len(similar_user_nodes), 600, 'o'),
+        (watched_movies + recommended_movie_nodes,
+         ['gray'] * len(watched_movies) + ['red'] * len(recommended_movie_nodes), 500, 's'),
+    ]
+    for nodes, colors, size, shape in node_groups:
+        if nodes:
+            xy = np.array([pos[n] for n in nodes])
+            plt.scatter(xy[:, 0], xy[:, 1], c=colors, s=size, marker=shape,
+                        edgecolors='black', linewidths=2, zorder=2)
     
-    # Draw recommended movies (green squares)
-    nx.draw_networkx_nodes(viz_graph, pos, nodelist=recommended_movie_nodes, node_color='red', node_size=500, 
-                          label='Recommended', node_shape='s', edgecolors='black', linewidths=2)
+    # Legend entries for the four node classes
+    legend_handles = [
+        Line2D([], [], marker=shape, linestyle='', markersize=14, markerfacecolor=color,
+               markeredgecolor='black', markeredgewidth=2, label=label)
+        for shape, color, label in (('o', 'lightgreen', 'Selected User'), ('o', 'lightblue', 'Similar Users'),
+                                    ('s', 'gray', 'Already Watched'), ('s', 'red', 'Recommended'))
+    ]
     
     # Draw edges
     nx.draw_networkx_edges(viz_graph, pos, alpha=0.3, width=1.5)
@@ -284,10 +258,13 @@ def visualize_user_neighborhood(user_node, top_recommendations):
     nx.draw_networkx_labels(viz_graph, pos, labels, font_size=8, font_weight='bold')
     
     user_id = mappings['node_to_user_id'].get(user_node)
+    watched_label = f'{n_watched} Watched'
+    if n_watched > len(watched_movies):
+        watched_label += f' ({len(watched_movies)} shown)'
     plt.title(f'Bipartite Recommendation Graph for {user_node} (ID: {user_id})\n' + 
-              f'{len(watched_movies)} Watched | {len(recommended_movie_nodes)} Recommended | {len(similar_user_nodes)} Similar Users',
+              f'{watched_label} | {len(recommended_movie_nodes)} Recommended | {len(similar_user_nodes)} Similar Users',
               fontsize=16, fontweight='bold', pad=20)
-    plt.legend(loc='upper right', fontsize=12, frameon=True, shadow=True)
+    plt.legend(handles=legend_handles, loc='upper right', fontsize=12, frameon=True, shadow=True)
     plt.axis('off')
     plt.tight_layout()
     plt.show()
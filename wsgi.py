@@ -0,0 +1,5 @@
+# WSGI entry point: gunicorn --preload -w 4 --threads 2 wsgi:app
+# With --preload the graph cache is loaded (or rebuilt) once in the master process.
+# The CSR arrays are memory-mapped, so workers share them through the page cache;
+# the remaining Python dicts and lists are per worker.
+from app import app